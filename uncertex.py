@@ -23,18 +23,55 @@ Version: 1.0
 """
 
 import os
+import sys
 import time
-import json
 import re
-import argparse
-import requests
-import numpy as np
+import math
+import random
+import types
+import asyncio
+import aiohttp
+import orjson
 from enum import Enum
 
 
 SIGNALOID_API_URL = "https://api.signaloid.io"
 SIGNALOID_API_KEY = os.environ.get("SIGNALOID_API_KEY")
 SIGNALOID_CORE_ID = os.environ.get("SIGNALOID_CORE_ID")
+SIGNALOID_API_HEADERS = {"Authorization": SIGNALOID_API_KEY}
+
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+OUTPUT_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=5)
+OUTPUT_CHUNK_SIZE = 16 * 1024
+MAX_OUTPUT_SIZE = 16 * 1024 * 1024
+
+REPORTED_PERCENTILES = (10, 25, 75, 90)
+
+# Matches a field printed by the task's C program, ignoring any trailing Ux distribution encoding
+UX_FIELD_PATTERN = re.compile(rb'"(amount|rate|result)":\s*(-?\d+\.\d+)')
+
+# C program run on Signaloid; filled with amount, min rate and max rate (%.17g round-trips a double exactly)
+TASK_SOURCE_CODE_TEMPLATE = '''
+    #include <math.h>
+    #include <stdint.h>
+    #include <stdio.h>
+    #include <uxhw.h>
+
+    int main() {
+        double amount = %.17g;
+        double rate = UxHwDoubleUniformDist(%.17g, %.17g);
+        double result = amount * rate;
+
+        printf("{\\n");
+        printf("  \\"amount\\": %%.2f,\\n", amount);
+        printf("  \\"rate\\": %%.4f,\\n", rate);
+        printf("  \\"result\\": %%.2f\\n", result);
+        printf("}\\n");
+
+        return 0;
+    }
+'''
 
 
 class TaskStatus(Enum):
@@ -46,41 +83,80 @@ class TaskStatus(Enum):
     STOPPED = "Stopped"
 
 
-def get_args() -> argparse.Namespace:
+TERMINAL_TASK_STATUSES = frozenset({TaskStatus.COMPLETED, TaskStatus.CANCELLED, TaskStatus.STOPPED})
+
+USAGE = "usage: uncertex.py [-h] [-f FROM] [-t TO] [--min-rate MIN_RATE] [--max-rate MAX_RATE] [-j] amount"
+
+# Options taking a value, mapped to (attribute name, whether the value is a float)
+VALUE_OPTIONS = {
+    '-f': ('from_currency', False),
+    '--from': ('from_currency', False),
+    '-t': ('to_currency', False),
+    '--to': ('to_currency', False),
+    '--min-rate': ('min_rate', True),
+    '--max-rate': ('max_rate', True),
+}
+
+# A negative number is a positional amount, not an option
+NUMBER_PATTERN = re.compile(r'-\d+(\.\d*)?|-\.\d+')
+
+
+def exit_with_usage_error(message: str) -> None:
+    """Print a usage error to stderr and exit with status 2, matching argparse."""
+    sys.stderr.write(f"{USAGE}\nuncertex.py: error: {message}\n")
+    sys.exit(2)
+
+
+def parse_float(name: str, value: str) -> float:
+    """Convert a command-line value to float, exiting with a usage error if it is invalid."""
+    try:
+        return float(value)
+    except ValueError:
+        exit_with_usage_error(f"argument {name}: invalid float value: '{value}'")
+
+
+def get_args() -> types.SimpleNamespace:
     """Parse and return command-line arguments."""
-    parser = argparse.ArgumentParser(description="UncertEx: Currency Converter with Uncertainty")
-    parser.add_argument('amount', type=float, help='Amount to convert')
-    parser.add_argument('-f', '--from', dest='from_currency', default='GBP', help='Source currency (default: GBP)')
-    parser.add_argument('-t', '--to', dest='to_currency', default='EUR', help='Target currency (default: EUR)')
-    parser.add_argument('--min-rate', type=float, default=1.15, help='Minimum conversion rate')
-    parser.add_argument('--max-rate', type=float, default=1.2, help='Maximum conversion rate')
-    parser.add_argument('-j', '--json', action='store_true', help='Output results as JSON')
+    args = types.SimpleNamespace(amount=None, from_currency='GBP', to_currency='EUR', 
+                                 min_rate=1.15, max_rate=1.2, json=False)
+    tokens = sys.argv[1:]
+    
+    while tokens:
+        token = tokens.pop(0)
+        
+        if token in ('-h', '--help'):
+            print(__doc__)
+            sys.exit(0)
+        
+        if token in ('-j', '--json'):
+            args.json = True
+            continue
+        
+        option, has_inline_value, value = token.partition('=') if token.startswith('--') else (token, '', '')
+        
+        if option in VALUE_OPTIONS:
+            dest, is_float = VALUE_OPTIONS[option]
+            if not has_inline_value:
+                if not tokens:
+                    exit_with_usage_error(f"argument {option}: expected one argument")
+                value = tokens.pop(0)
+            setattr(args, dest, parse_float(option, value) if is_float else value)
+        elif token.startswith('-') and not NUMBER_PATTERN.fullmatch(token):
+            exit_with_usage_error(f"unrecognized arguments: {token}")
+        elif args.amount is None:
+            args.amount = parse_float('amount', token)
+        else:
+            exit_with_usage_error(f"unrecognized arguments: {token}")
     
-    return parser.parse_args()
+    if args.amount is None:
+        exit_with_usage_error("the following arguments are required: amount")
+    
+    return args
 
 
 def create_task_object(amount: float, min_rate: float, max_rate: float) -> dict[str, any]:
     """Create a task object with the given parameters for the Signaloid API."""
-    source_code = f'''
-        #include <math.h>
-        #include <stdint.h>
-        #include <stdio.h>
-        #include <uxhw.h>
-
-        int main() {{
-            double amount = {amount};
-            double rate = UxHwDoubleUniformDist({min_rate}, {max_rate});
-            double result = amount * rate;
-
-            printf("{{\\n");
-            printf("  \\"amount\\": %.2f,\\n", amount);
-            printf("  \\"rate\\": %.4f,\\n", rate);
-            printf("  \\"result\\": %.2f\\n", result);
-            printf("}}\\n");
- 
-            return 0;
-        }}
-    '''
+    source_code = TASK_SOURCE_CODE_TEMPLATE % (amount, min_rate, max_rate)
     
     return {
         "Type": "SourceCode",
@@ -96,101 +172,123 @@ def create_task_object(amount: float, min_rate: float, max_rate: float) -> dict[
     }
 
 
-def create_task(task_object: dict[str, any]) -> dict[str, any]:
-    """Create a new task with the given payload using the Signaloid API."""
-    headers = {"Authorization": SIGNALOID_API_KEY, "Content-Type": "application/json"}
-    response = requests.post(f"{SIGNALOID_API_URL}/tasks", headers=headers, json=task_object)
+def create_session() -> aiohttp.ClientSession:
+    """Create an HTTP session with a pooled keep-alive connector shared by all API calls."""
+    connector = aiohttp.TCPConnector(limit=16, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def get_with_retries(session: aiohttp.ClientSession, url: str, retries: int = 3, 
+                           backoff_factor: float = 0.3, **kwargs) -> aiohttp.ClientResponse:
+    """Send a GET request, retrying connection errors and gateway errors with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            response = await session.get(url, **kwargs)
+        except aiohttp.ClientConnectionError:
+            if attempt == retries:
+                raise
+        else:
+            if response.status not in RETRY_STATUS_CODES or attempt == retries:
+                return response
+            response.release()
+        
+        await asyncio.sleep(backoff_factor * 2 ** attempt)
 
-    if response.status_code == 202:
-        return response.json()
-    else:
-        raise Exception(f"API call to Signaloid failed with status code: {response.status_code}; error: {response.json()}")
+
+async def create_task(session: aiohttp.ClientSession, task_object: dict[str, any]) -> dict[str, any]:
+    """Create a new task with the given payload using the Signaloid API."""
+    async with session.post(f"{SIGNALOID_API_URL}/tasks", headers=SIGNALOID_API_HEADERS, json=task_object) as response:
+        if response.status == 202:
+            return await response.json()
+        else:
+            raise Exception(f"API call to Signaloid failed with status code: {response.status}; error: {await response.text()}")
 
 
-def get_task_status(task_id: str) -> dict[str, any]:
+async def get_task_status(session: aiohttp.ClientSession, task_id: str) -> dict[str, any]:
     """Retrieve the task status from the Signaloid API."""
-    headers = {"Authorization": SIGNALOID_API_KEY}
-    response = requests.get(f"{SIGNALOID_API_URL}/tasks/{task_id}", headers=headers)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise Exception(f"Failed to get task status. Status code: {response.status_code}")
+    url = f"{SIGNALOID_API_URL}/tasks/{task_id}"
+    async with await get_with_retries(session, url, headers=SIGNALOID_API_HEADERS) as response:
+        if response.status == 200:
+            return await response.json()
+        else:
+            raise Exception(f"Failed to get task status. Status code: {response.status}")
 
 
-def get_task_output(task_id: str) -> dict[str, any]:
+async def get_task_output(session: aiohttp.ClientSession, task_id: str) -> dict[str, any]:
     """Retrieve the task output from the Signaloid API."""
-    headers = {"Authorization": SIGNALOID_API_KEY}
-    response = requests.get(f"{SIGNALOID_API_URL}/tasks/{task_id}/outputs?sanitized=false", headers=headers)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise Exception(f"Failed to get task output. Status code: {response.status_code}")
-
-
-def wait_for_task_completion(task_id: str, max_wait_time: int = 60, check_interval: int = 5) -> TaskStatus:
-    """Wait for the task to complete, checking periodically."""
-    start_time = time.time()
+    url = f"{SIGNALOID_API_URL}/tasks/{task_id}/outputs?sanitized=false"
+    async with await get_with_retries(session, url, headers=SIGNALOID_API_HEADERS) as response:
+        if response.status == 200:
+            return await response.json()
+        else:
+            raise Exception(f"Failed to get task output. Status code: {response.status}")
+
+
+async def wait_for_task_completion(session: aiohttp.ClientSession, task_id: str, max_wait_time: int = 60, 
+                                   initial_interval: float = 0.25, max_interval: float = 5.0) -> TaskStatus:
+    """Wait for the task to complete, polling with exponential backoff and jitter."""
+    start_time = time.monotonic()
+    delay = initial_interval
     
-    while time.time() - start_time < max_wait_time:
-        task_status = get_task_status(task_id)
+    while time.monotonic() - start_time < max_wait_time:
+        task_status = await get_task_status(session, task_id)
         status = TaskStatus(task_status['Status'])
 
-        if status in {TaskStatus.COMPLETED, TaskStatus.CANCELLED, TaskStatus.STOPPED}:
+        if status in TERMINAL_TASK_STATUSES:
             return status
         
         print("Specified task is still in progress. Waiting...")
-        time.sleep(check_interval)
+        await asyncio.sleep(delay + random.uniform(0, delay * 0.1))
+        delay = min(delay * 1.7, max_interval)
     
     raise Exception("Task timed out")
 
 
-def handle_request(url: str) -> str:
-    """Handle a request to the given URL."""
+async def handle_request(session: aiohttp.ClientSession, url: str) -> bytes:
+    """Handle a request to the given URL, streaming at most MAX_OUTPUT_SIZE bytes of the body."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        return response.content.decode('utf-8')
-    except requests.RequestException as e:
+        async with await get_with_retries(session, url, timeout=OUTPUT_REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(OUTPUT_CHUNK_SIZE):
+                body += chunk
+                if len(body) > MAX_OUTPUT_SIZE:
+                    print(f"Output exceeds {MAX_OUTPUT_SIZE} bytes; truncating.")
+                    del body[MAX_OUTPUT_SIZE:]
+                    break
+            
+            return bytes(body)
+    except asyncio.TimeoutError:
+        print(f"Request timed out after {OUTPUT_REQUEST_TIMEOUT.total} seconds")
+        return b""
+    except aiohttp.ClientError as e:
         print(f"Request failed: {e}")
-        return ""
+        return b""
 
 
-def extract_value(ux_string: str) -> float:
-    """Extract the numerical value from a Ux string."""
-    match = re.match(r'(\d+\.\d+)Ux', ux_string)
-    
-    if match:
-        return float(match.group(1))
-    return None
+def parse_custom_json(json_bytes: bytes) -> dict[str, any]:
+    """Parse the custom JSON format with Ux values into the numerical value of each field."""
+    return {key.decode('ascii'): float(value) for key, value in UX_FIELD_PATTERN.findall(json_bytes)}
 
 
-def parse_custom_json(json_string: str) -> dict[str, any]:
-    """Parse the custom JSON format with Ux values."""
-    # Replace Ux values with string representations
-    json_string = re.sub(r'(\d+\.\d+Ux[0-9A-Fa-f]+)', r'"\1"', json_string)
-    
-    # Parse the modified JSON string
-    data = json.loads(json_string)
+def uniform_distribution_statistics(amount: float, min_rate: float, max_rate: float) -> dict[str, any]:
+    """Compute the exact statistics of the converted value for a uniformly distributed rate."""
+    low, high = sorted((amount * min_rate, amount * max_rate))
+    mean = (low + high) / 2
     
-    # Extract numerical values from Ux strings
-    for key in data:
-        if isinstance(data[key], str) and data[key].startswith(tuple('0123456789')) and 'Ux' in data[key]:
-            data[key] = extract_value(data[key])
-    
-    return data
-
-
-def generate_samples(mean: float, min_rate: float, max_rate: float, num_samples: int = 10000) -> np.ndarray:
-    """Generate samples based on uniform distribution of rates."""
-    rates = np.random.uniform(min_rate, max_rate, num_samples)
-    return mean * rates
+    return {
+        "mean": mean,
+        "median": mean,
+        "standard_deviation": (high - low) / math.sqrt(12),
+        "minimum": low,
+        "maximum": high,
+        "percentiles": {f"{p}th": low + (p / 100) * (high - low) for p in REPORTED_PERCENTILES}
+    }
 
 
 def format_output_as_json(amount: float, min_rate: float, max_rate: float, from_currency: str, to_currency: str, 
-                          rate: float, result: float, samples: np.ndarray) -> dict[str, any]:
+                          rate: float, result: float) -> dict[str, any]:
     """Format the output results as a JSON-serializable dictionary."""
     return {
         "input": {
@@ -203,87 +301,75 @@ def format_output_as_json(amount: float, min_rate: float, max_rate: float, from_
         "output": {
             "average_rate": rate,
             "average_result": result,
-            "distribution": {
-                "mean": float(np.mean(samples)),
-                "median": float(np.median(samples)),
-                "standard_deviation": float(np.std(samples)),
-                "minimum": float(np.min(samples)),
-                "maximum": float(np.max(samples)),
-                "percentiles": {
-                    "10th": float(np.percentile(samples, 10)),
-                    "25th": float(np.percentile(samples, 25)),
-                    "75th": float(np.percentile(samples, 75)),
-                    "90th": float(np.percentile(samples, 90))
-                }
-            }
+            "distribution": uniform_distribution_statistics(amount, min_rate, max_rate)
         }
     }
 
 
-def process_task_output(task_status: TaskStatus, task_output: dict[str, str], 
+def format_output_as_text(amount: float, min_rate: float, max_rate: float, from_currency: str, to_currency: str, 
+                          rate: float, result: float) -> str:
+    """Format the output results as a human-readable report."""
+    statistics = uniform_distribution_statistics(amount, min_rate, max_rate)
+    
+    lines = [
+        f"\nAmount: {amount:.2f} {from_currency}",
+        f"Average Rate: {rate:.4f}",
+        f"Average Result: {result:.2f} {to_currency}",
+        f"\nDistribution of converted value in {to_currency}:",
+        f"  Mean: {statistics['mean']:.2f}",
+        f"  Median: {statistics['median']:.2f}",
+        f"  Standard Deviation: {statistics['standard_deviation']:.2f}",
+        f"  Minimum: {statistics['minimum']:.2f}",
+        f"  Maximum: {statistics['maximum']:.2f}",
+        "\nPercentiles:"
+    ]
+    lines.extend(f"  {name}: {value:.2f}" for name, value in statistics['percentiles'].items())
+    
+    return "\n".join(lines) + "\n"
+
+
+async def process_task_output(session: aiohttp.ClientSession, task_status: TaskStatus, task_output: dict[str, str], 
                         from_currency: str, to_currency: str, min_rate: float, max_rate: float, 
                         json_output: bool) -> None:
     """Process and display the task output."""
     if task_status == TaskStatus.COMPLETED:
         url = task_output['Stdout']
-        decoded_response = handle_request(url)
+        response = await handle_request(session, url)
         
-        if decoded_response:
+        if response:
             try:
-                stdout_response = parse_custom_json(decoded_response)
+                stdout_response = parse_custom_json(response)
                 amount = stdout_response['amount']
                 rate = stdout_response['rate']
                 result = stdout_response['result']
 
-                samples = generate_samples(amount, min_rate, max_rate)
-                
                 if json_output:
-                    output = format_output_as_json(amount, min_rate, max_rate, from_currency, to_currency, rate, result, samples)
-                    print(json.dumps(output, indent=2))
+                    output = format_output_as_json(amount, min_rate, max_rate, from_currency, to_currency, rate, result)
+                    print(orjson.dumps(output, option=orjson.OPT_INDENT_2).decode())
                 else:
-                    print(f"\nAmount: {amount:.2f} {from_currency}")
-                    print(f"Average Rate: {rate:.4f}")
-                    print(f"Average Result: {result:.2f} {to_currency}")
-                    
-                    mean = np.mean(samples)
-                    median = np.median(samples)
-                    stdev = np.std(samples)
-                    min_val = np.min(samples)
-                    max_val = np.max(samples)
-                    
-                    print(f"\nDistribution of converted value in {to_currency}:")
-                    print(f"  Mean: {mean:.2f}")
-                    print(f"  Median: {median:.2f}")
-                    print(f"  Standard Deviation: {stdev:.2f}")
-                    print(f"  Minimum: {min_val:.2f}")
-                    print(f"  Maximum: {max_val:.2f}")
-                    
-                    percentiles = [10, 25, 75, 90]
-                    print("\nPercentiles:")
-                    for p in percentiles:
-                        value = np.percentile(samples, p)
-                        print(f"  {p}th: {value:.2f}")
+                    sys.stdout.write(format_output_as_text(amount, min_rate, max_rate, from_currency, to_currency, 
+                                                           rate, result))
             except Exception as e:
                 print(f"Error processing output: {e}")
                 print("Raw output:")
-                print(decoded_response)
+                print(response.decode('utf-8', errors='replace'))
     
     elif task_status == TaskStatus.CANCELLED:
         url = task_output['Stderr']
-        decoded_response = handle_request(url)
+        response = await handle_request(session, url)
         
-        if decoded_response:
-            print(f"\nError:\n{decoded_response}")
+        if response:
+            print(f"\nError:\n{response.decode('utf-8', errors='replace')}")
     
     else:
         url = task_output['Build']
-        decoded_response = handle_request(url)
+        response = await handle_request(session, url)
         
-        if decoded_response:
-            print(f"\nBuild issue:\n{decoded_response}")
+        if response:
+            print(f"\nBuild issue:\n{response.decode('utf-8', errors='replace')}")
 
 
-def main() -> None:
+async def main() -> None:
     """Main function to execute the currency conversion."""
     print("Welcome to UncertEx: Currency Converter with Uncertainty")
     args = get_args()
@@ -292,21 +378,23 @@ def main() -> None:
         print(f"\nConverting {args.amount} {args.from_currency} to {args.to_currency}")
         print(f"Using conversion rate uniformly distributed between {args.min_rate} and {args.max_rate}")
     
-    task_object = create_task_object(args.amount, args.min_rate, args.max_rate)
-    task = create_task(task_object)
-    task_id = task['TaskID']
-    
-    if not args.json:
-        print(f"\nTask submitted successfully with ID: {task_id}")
-    
-    task_status = wait_for_task_completion(task_id)
-    
-    if not args.json:
-        print(f"Task completed with status: {task_status.value}.")
-    
-    task_output = get_task_output(task_id)
-    process_task_output(task_status, task_output, args.from_currency, args.to_currency, args.min_rate, args.max_rate, args.json)
+    async with create_session() as session:
+        task_object = create_task_object(args.amount, args.min_rate, args.max_rate)
+        task = await create_task(session, task_object)
+        task_id = task['TaskID']
+        
+        if not args.json:
+            print(f"\nTask submitted successfully with ID: {task_id}")
+        
+        task_status = await wait_for_task_completion(session, task_id)
+        
+        if not args.json:
+            print(f"Task completed with status: {task_status.value}.")
+        
+        task_output = await get_task_output(session, task_id)
+        await process_task_output(session, task_status, task_output, args.from_currency, args.to_currency, 
+                                  args.min_rate, args.max_rate, args.json)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())